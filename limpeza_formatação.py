@@ -9,13 +9,66 @@ import os
 source_data_dir = "data/raw" # Contém zips e CSVs originais (exceto 2024)
 source_tmp_dir = "data/raw/tmp" # Contém CSV original de 2024
 output_cleaned_yearly_dir = "data/cleaned_yearly"
+output_quarantine_dir = "data/quarantine" # Linhas que violaram alguma regra de validação
 
-# Criar diretório de saída se não existir
+# Criar diretórios de saída se não existirem
 os.makedirs(output_cleaned_yearly_dir, exist_ok=True)
+os.makedirs(output_quarantine_dir, exist_ok=True)
 
 # Tamanho do chunk para leitura
 chunk_size = 100000  # Processar 100,000 linhas por vez
 
+# --- Regras de validação de qualidade dos dados ---
+# Valor sentinela usado pelo INPE para indicar ausência de medição
+SENTINEL_VALUE = -999
+# Colunas em que o sentinela é substituído por NaN (o foco continua válido, só falta a medição)
+SENTINEL_COLS = ['numero_dias_sem_chuva', 'precipitacao', 'risco_fogo']
+# Regras que tornam o próprio foco inutilizável: a linha é removida do arquivo limpo
+DROP_RULES = ['coordenada_invalida', 'fora_do_brasil', 'frp_negativo']
+# Caixa delimitadora aproximada do Brasil (inclui ilhas oceânicas)
+BRAZIL_LAT_RANGE = (-33.8, 5.3)
+BRAZIL_LON_RANGE = (-74.0, -28.6)
+# Colunas mantidas no arquivo de quarentena (mantê-lo compacto)
+quarantine_cols = ["data_pas", "datahora", "latitude", "longitude", "estado", "municipio", "bioma",
+                   "numero_dias_sem_chuva", "precipitacao", "risco_fogo", "frp"]
+
+
+def numeric_col(chunk, col):
+    """Retorna a coluna como numérica (valores inválidos viram NaN) ou None se não existir."""
+    if col in chunk.columns:
+        return pd.to_numeric(chunk[col], errors='coerce')
+    return None
+
+
+def validation_masks(chunk):
+    """Avalia as regras de validação no chunk e retorna um DataFrame booleano (True = linha reprovada na regra)."""
+    masks = pd.DataFrame(index=chunk.index)
+    lat = numeric_col(chunk, 'latitude')
+    lon = numeric_col(chunk, 'longitude')
+
+    if lat is not None and lon is not None:
+        invalid_coords = ~lat.between(-90, 90) | ~lon.between(-180, 180)
+        masks['coordenada_invalida'] = invalid_coords
+        # Só marcar como fora do Brasil coordenadas que sejam válidas
+        outside_brazil = (~lat.between(*BRAZIL_LAT_RANGE) | ~lon.between(*BRAZIL_LON_RANGE)) & ~invalid_coords
+        masks['fora_do_brasil'] = outside_brazil
+
+    frp = numeric_col(chunk, 'frp')
+    if frp is not None:
+        masks['frp_negativo'] = frp < 0
+
+    for col in SENTINEL_COLS:
+        values = numeric_col(chunk, col)
+        if values is not None:
+            masks[f'sentinela_{col}'] = values == SENTINEL_VALUE
+
+    return masks
+
+
+# Contagem de violações por ano (linhas) e regra (colunas), mais os totais de linhas removidas e de linhas
+# com sentinela substituído; acumulada entre arquivos processados por completo
+violation_counts = pd.DataFrame()
+
 # Encontrar os arquivos CSV originais nos diretórios corretos
 csv_files_main = glob.glob(os.path.join(source_data_dir, "focos_br_todos-sats_*.csv"))
 csv_files_tmp = glob.glob(os.path.join(source_tmp_dir, "focos_br_todos-sats_*.csv"))
@@ -39,8 +92,22 @@ else:
         #     print(f"Arquivo limpo {cleaned_file_path} já existe. Pulando...")
         #     continue
             
+        quarantine_file_path = os.path.join(output_quarantine_dir, f"{os.path.splitext(base_name)[0]}_quarentena.csv")
+        # Ano do arquivo, usado quando a data da linha não pôde ser convertida
+        file_year = os.path.splitext(base_name)[0].split("_")[-1]
+        # Remover quarentena de execução anterior (o arquivo só é recriado se houver rejeições)
+        if os.path.exists(quarantine_file_path):
+            os.remove(quarantine_file_path)
+
         first_chunk = True # Flag para controlar a escrita do cabeçalho
+        first_quarantine_chunk = True
         total_rows_processed = 0
+        total_rows_written = 0
+        total_duplicates = 0
+        total_rows_rejected = 0
+        total_rows_with_sentinel = 0
+        # Contagens do arquivo atual, somadas ao resumo geral só se o arquivo for processado por completo
+        file_violation_counts = pd.DataFrame()
         
         try:
             # Usar um iterator para ler o arquivo em chunks
@@ -61,6 +128,7 @@ else:
 
                 # --- Início da Limpeza do Chunk --- 
                 chunk.drop_duplicates(inplace=True)
+                total_duplicates += rows_in_chunk - len(chunk)
 
                 # Padronizar/Converter coluna de data/hora (usar data_pas se datahora não existir)
                 date_col_to_use = None
@@ -80,21 +148,84 @@ else:
                     if col in chunk.columns:
                         chunk[col] = chunk[col].fillna('DESCONHECIDO').astype(str).str.upper()
 
+                # --- Validação do Chunk (máscaras booleanas vetorizadas) ---
+                masks = validation_masks(chunk)
+                flagged = masks.any(axis=1)
+
+                if flagged.any():
+                    sentinel_rules = [f'sentinela_{col}' for col in SENTINEL_COLS if f'sentinela_{col}' in masks.columns]
+                    # Apenas focos inutilizáveis (coordenadas inválidas/fora do Brasil, frp negativo) são removidos
+                    rejected = masks[[r for r in DROP_RULES if r in masks.columns]].any(axis=1)
+                    with_sentinel = masks[sentinel_rules].any(axis=1)
+
+                    # Contar violações por regra e por ano, com os totais de linhas removidas e com sentinela
+                    if date_col_to_use and pd.api.types.is_datetime64_any_dtype(chunk[date_col_to_use]):
+                        row_year = chunk[date_col_to_use].dt.strftime('%Y').fillna(file_year)
+                    else:
+                        row_year = pd.Series(file_year, index=chunk.index)
+                    chunk_counts = masks[flagged].assign(linhas_removidas=rejected[flagged],
+                                                         linhas_com_sentinela=with_sentinel[flagged])
+                    chunk_counts = chunk_counts.groupby(row_year[flagged]).sum()
+                    file_violation_counts = file_violation_counts.add(chunk_counts, fill_value=0)
+
+                    # Enviar linhas sinalizadas para a quarentena, com as regras violadas
+                    quarantine = chunk.loc[flagged, [c for c in quarantine_cols if c in chunk.columns]].copy()
+                    failed_rules = masks[flagged]
+                    quarantine['regras_violadas'] = failed_rules.dot(failed_rules.columns + ';').str.rstrip(';')
+                    quarantine.to_csv(quarantine_file_path, index=False,
+                                      mode='w' if first_quarantine_chunk else 'a', header=first_quarantine_chunk)
+                    first_quarantine_chunk = False
+
+                    # Sentinelas viram NaN: o foco é mantido e describe() ignora o valor ausente
+                    total_rows_with_sentinel += int(with_sentinel.sum())
+                    for rule in sentinel_rules:
+                        col = rule[len('sentinela_'):]
+                        chunk[col] = chunk[col].mask(masks[rule])
+
+                    total_rows_rejected += int(rejected.sum())
+                    chunk = chunk[~rejected]
+
                 # --- Fim da Limpeza do Chunk --- 
 
                 # Salvar/Anexar o chunk limpo
+                total_rows_written += len(chunk)
                 if first_chunk:
                     chunk.to_csv(cleaned_file_path, index=False, mode='w', header=True)
                     first_chunk = False
                 else:
                     chunk.to_csv(cleaned_file_path, index=False, mode='a', header=False)
             
-            print(f"Arquivo {f} processado. Total de linhas: {total_rows_processed}. Arquivo limpo salvo em: {cleaned_file_path}")
+            print(f"Arquivo {f} processado. Total de linhas: {total_rows_processed}. Duplicatas removidas: {total_duplicates}. Linhas gravadas: {total_rows_written}. Arquivo limpo salvo em: {cleaned_file_path}")
+            if not first_quarantine_chunk:
+                print(f"Linhas removidas na validação: {total_rows_rejected}. Linhas com sentinela substituído por NaN: {total_rows_with_sentinel}. Quarentena salva em: {quarantine_file_path}")
+            violation_counts = violation_counts.add(file_violation_counts, fill_value=0)
 
         except Exception as e:
             print(f"Erro GERAL ao processar o arquivo {f}: {e}")
+            # Descartar saídas parciais (arquivo limpo e quarentena); as contagens deste arquivo não entram no resumo
+            for partial_path in [cleaned_file_path, quarantine_file_path]:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
             continue # Pular para o próximo arquivo
 
     print("\n--- Processamento de todos os arquivos originais concluído ---")
     print(f"Arquivos limpos por ano salvos em: {output_cleaned_yearly_dir}")
+
+    # Salvar resumo de violações por ano e por regra
+    violation_summary_path = os.path.join(output_quarantine_dir, "resumo_violacoes.csv")
+    if not violation_counts.empty:
+        # Regras primeiro, totais de linhas no final
+        total_cols = ['linhas_removidas', 'linhas_com_sentinela']
+        rule_cols = [c for c in violation_counts.columns if c not in total_cols]
+        violation_counts = violation_counts[rule_cols + total_cols].fillna(0).astype(int).sort_index()
+        violation_counts.index.name = "ano"
+        violation_counts.to_csv(violation_summary_path)
+        print("\n--- Violações por ano e por regra ---")
+        print(violation_counts.to_string())
+        print(f"Resumo de violações salvo em: {violation_summary_path}")
+    else:
+        # Remover resumo de execução anterior para não ficar inconsistente com esta execução
+        if os.path.exists(violation_summary_path):
+            os.remove(violation_summary_path)
+        print("Nenhuma violação encontrada na validação.")
     
\ No newline at end of file